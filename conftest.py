@@ -0,0 +1 @@
+# 放在仓库根目录，使 pytest 把根目录加入 sys.path，测试可以直接导入各模块
@@ -0,0 +1,211 @@
+# -*- coding: UTF-8 -*-
+"""密码哈希与校验
+
+密码用 scrypt（不可用时退回 PBKDF2）加盐哈希，保存格式：
+    scrypt$n$r$p$盐$哈希
+    pbkdf2_sha256$迭代次数$盐$哈希
+不符合上述格式的旧数据视为明文密码，校验通过后应换成哈希保存。
+
+慢哈希放在线程池中计算（hashlib 计算时会释放 GIL），避免卡住游戏主循环；
+最近校验通过的会话保存在有上限的缓存中，重复登录不必再次哈希。
+
+运行 python credentials.py 可测试并发登录的延迟。
+"""
+import argparse
+import hashlib
+import hmac
+import os
+import secrets
+import statistics
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 200000
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+HAS_SCRYPT = hasattr(hashlib, "scrypt")
+
+
+def hash_password(password, salt=None):
+    """计算密码哈希（较慢，应在工作线程中调用）"""
+    salt = salt or os.urandom(SALT_BYTES)
+    if HAS_SCRYPT:
+        digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=SCRYPT_N,
+                                r=SCRYPT_R, p=SCRYPT_P, dklen=HASH_BYTES)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt,
+                                 PBKDF2_ITERATIONS, dklen=HASH_BYTES)
+    return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${salt.hex()}${digest.hex()}"
+
+
+def is_hashed(stored):
+    """判断保存的密码是否已经是哈希格式（各字段都能正确解析）"""
+    parts = stored.split("$")
+    try:
+        if parts[0] == "scrypt" and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            bytes.fromhex(parts[4])
+            expected = bytes.fromhex(parts[5])
+            # scrypt 要求 n 是大于 1 的 2 的幂
+            return n > 1 and n & (n - 1) == 0 and r > 0 and p > 0 and len(expected) > 0
+        if parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+            iterations = int(parts[1])
+            bytes.fromhex(parts[2])
+            expected = bytes.fromhex(parts[3])
+            return iterations > 0 and len(expected) > 0
+    except ValueError:
+        pass
+    return False
+
+
+def needs_upgrade(stored):
+    """明文或参数过时的哈希需要重新计算"""
+    if not is_hashed(stored):
+        return True
+    if HAS_SCRYPT:
+        return stored.split("$")[:4] != ["scrypt", str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P)]
+    return stored.split("$")[:2] != ["pbkdf2_sha256", str(PBKDF2_ITERATIONS)]
+
+
+def verify_password(stored, password):
+    """校验密码（较慢），返回 (是否正确, 需要替换的新哈希或 None)"""
+    if not is_hashed(stored):
+        # 旧版明文密码
+        ok = hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8"))
+        return ok, (hash_password(password) if ok else None)
+
+    parts = stored.split("$")
+    if parts[0] == "scrypt":
+        n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+        salt, expected = bytes.fromhex(parts[4]), bytes.fromhex(parts[5])
+        digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                                dklen=len(expected), maxmem=256 * r * n + 1024 * 1024)
+    else:
+        iterations = int(parts[1])
+        salt, expected = bytes.fromhex(parts[2]), bytes.fromhex(parts[3])
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt,
+                                     iterations, dklen=len(expected))
+
+    ok = hmac.compare_digest(digest, expected)
+    return ok, (hash_password(password) if ok and needs_upgrade(stored) else None)
+
+
+def completed_future(result):
+    """返回已完成的 Future，用于不需要进入线程池的情况"""
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+class CredentialService:
+    """在线程池中哈希/校验密码，并缓存最近校验通过的会话"""
+
+    def __init__(self, max_workers=2, cache_size=128):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="credentials")
+        self._cache_size = cache_size
+        self._cache = OrderedDict()  # (用户名, 密码指纹) -> 当时保存的哈希
+        self._lock = threading.Lock()
+        # 进程内随机密钥，缓存里不保存明文密码
+        self._cache_key = secrets.token_bytes(32)
+
+    def _fingerprint(self, password):
+        return hmac.new(self._cache_key, password.encode("utf-8"), hashlib.sha256).digest()
+
+    def remember(self, username, stored, password):
+        """记录一次校验通过的会话"""
+        key = (username, self._fingerprint(password))
+        with self._lock:
+            self._cache[key] = stored
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def is_cached(self, username, stored, password):
+        """会话在缓存中且密码哈希未变化时返回 True"""
+        key = (username, self._fingerprint(password))
+        with self._lock:
+            if self._cache.get(key) != stored:
+                return False
+            self._cache.move_to_end(key)
+            return True
+
+    def forget(self, username):
+        """移除某个用户的全部缓存会话（例如修改密码后）"""
+        with self._lock:
+            for key in [k for k in self._cache if k[0] == username]:
+                del self._cache[key]
+
+    def hash_async(self, password):
+        """在线程池中计算哈希，返回 Future"""
+        return self._executor.submit(hash_password, password)
+
+    def verify_async(self, username, stored, password):
+        """在线程池中校验密码，返回结果为 (是否正确, 新哈希或 None) 的 Future
+
+        命中会话缓存时直接返回已完成的 Future，不再哈希。
+        """
+        if self.is_cached(username, stored, password):
+            return completed_future((True, None))
+        return self._executor.submit(verify_password, stored, password)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def benchmark(attempts=32, workers=4, users=8):
+    """并发登录延迟测试：先冷启动（需要哈希），再重复登录（命中缓存）"""
+    service = CredentialService(max_workers=workers)
+    stored = {f"user{i}": hash_password(f"password{i}") for i in range(users)}
+
+    def run(label):
+        latencies = []
+        finished = threading.Semaphore(0)
+
+        def record(future, submitted):
+            latencies.append(time.perf_counter() - submitted)
+            finished.release()
+
+        start = time.perf_counter()
+        futures = []
+        for i in range(attempts):
+            username = f"user{i % users}"
+            submitted = time.perf_counter()
+            future = service.verify_async(username, stored[username], f"password{i % users}")
+            future.add_done_callback(lambda f, t=submitted: record(f, t))
+            futures.append((username, future))
+        # 回调可能晚于 Future 完成，等所有回调都记录了延迟
+        for _ in range(attempts):
+            finished.acquire()
+        elapsed = time.perf_counter() - start
+        for username, future in futures:
+            if future.result()[0]:
+                service.remember(username, stored[username], f"password{username[4:]}")
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"{label}: {attempts}次登录，{workers}个线程，总耗时 {elapsed * 1000:.1f}ms，"
+              f"中位延迟 {statistics.median(latencies) * 1000:.2f}ms，"
+              f"P95 {p95 * 1000:.2f}ms")
+
+    run("无缓存")
+    run("命中缓存")
+    service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并发登录延迟测试")
+    parser.add_argument("--attempts", type=int, default=32, help="登录次数")
+    parser.add_argument("--workers", type=int, default=4, help="哈希线程数")
+    parser.add_argument("--users", type=int, default=8, help="用户数")
+    args = parser.parse_args()
+    benchmark(args.attempts, args.workers, args.users)
+
+
+if __name__ == "__main__":
+    main()
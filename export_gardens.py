@@ -0,0 +1,395 @@
+# -*- coding: UTF-8 -*-
+"""流式导出所有花园数据，用于统计分析
+
+逐株增量解析 game_data.json（或二进制快照），不把整个文件或某个用户的全部植物读入内存，
+输出 users / plants 两张扁平表（CSV，或安装了 pyarrow 时输出 Parquet），
+并可打印按阶段统计、平均水分/阳光、待收获果实、积分分布等汇总。
+
+示例：
+    python export_gardens.py game_data.json -o export --summary
+    python export_gardens.py game_data.snap -o export --area garden --stage 1
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+import snapshot
+
+CHUNK_SIZE = 64 * 1024
+PARQUET_BATCH_SIZE = 10000
+
+USER_COLUMNS = ["username", "points", "plant_count", "unlocked_areas"]
+PLANT_COLUMNS = ["username", "id", "type", "area", "stage", "water_level", "sun_level",
+                 "last_watered", "last_sunned", "fruits", "x", "y"]
+
+# Parquet 列类型（pyarrow 类型名），水分/阳光可能是整数也可能是小数，统一为 float64
+COLUMN_TYPES = {
+    "username": "string",
+    "points": "int64",
+    "plant_count": "int64",
+    "unlocked_areas": "string",
+    "id": "int64",
+    "type": "string",
+    "area": "string",
+    "stage": "int64",
+    "water_level": "float64",
+    "sun_level": "float64",
+    "last_watered": "string",
+    "last_sunned": "string",
+    "fruits": "int64",
+    "x": "int64",
+    "y": "int64",
+}
+
+# 积分分布的分桶上限
+POINTS_BUCKETS = (0, 50, 100, 200, 500, 1000, 5000)
+
+_WHITESPACE = " \t\r\n"
+
+
+class _Reader:
+    """按块读取文本，并用 raw_decode 逐个解析 JSON 值"""
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size=CHUNK_SIZE):
+        chunk = self.f.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        # 丢弃已解析的部分，保持缓冲区只包含当前值
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """跳过空白，返回下一个字符（文件结束时返回空串）"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"JSON 格式错误：期望 '{char}'，位置 {self.pos}")
+        self.pos += 1
+
+    def value(self, decoder=json.JSONDecoder()):
+        """解析下一个完整的 JSON 值，不完整时继续读取
+
+        每次重试读取的量翻倍，大的值只需重新解析对数次。
+        """
+        self.peek()
+        size = CHUNK_SIZE
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof or not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            # 数字可能被块边界截断，确认后面还有内容
+            if end == len(self.buffer) and not self.eof and self._fill(size):
+                continue
+            self.pos = end
+            return value
+
+    def _items(self, open_char, close_char, is_object):
+        self.expect(open_char)
+        if self.peek() == close_char:
+            self.pos += 1
+            return
+        while True:
+            if is_object:
+                key = self.value()
+                self.expect(":")
+                yield key
+            else:
+                yield None
+            char = self.peek()
+            self.pos += 1
+            if char == close_char:
+                return
+            if char != ",":
+                raise ValueError(f"JSON 格式错误：期望 ',' 或 '{close_char}'，位置 {self.pos}")
+
+    def object_items(self):
+        """逐个产出对象的键，调用方负责紧接着读取对应的值"""
+        return self._items("{", "}", True)
+
+    def array_items(self):
+        """逐个产出数组元素的位置，调用方负责紧接着读取元素"""
+        return self._items("[", "]", False)
+
+
+def iter_records_json(path):
+    """从 game_data.json 流式产出记录，植物逐株解析
+
+    产出 ("plant", 用户名, 已读到的用户字段, 植物)，
+    每个用户结束时产出 ("user", 用户名, 用户字段, 植物数)。
+    用户字段不含 plants。
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _Reader(f)
+        for key in reader.object_items():
+            if key != "users":
+                reader.value()
+                continue
+            for username in reader.object_items():
+                user = {}
+                plant_count = 0
+                for field in reader.object_items():
+                    if field != "plants":
+                        user[field] = reader.value()
+                        continue
+                    for _ in reader.array_items():
+                        plant_count += 1
+                        yield "plant", username, user, reader.value()
+                yield "user", username, user, plant_count
+
+
+def iter_records_snapshot(path):
+    """从二进制快照流式产出记录，格式同 iter_records_json"""
+    with snapshot.Snapshot(path) as snap:
+        for username in snap.usernames():
+            user = snap.get_user(username, plants=False)
+            del user["plants"]
+            plant_count = 0
+            for plant in snap.iter_plants(username):
+                plant_count += 1
+                yield "plant", username, user, plant
+            yield "user", username, user, plant_count
+
+
+def iter_records(path):
+    """根据文件头选择解析方式"""
+    with open(path, "rb") as f:
+        is_snapshot = f.read(len(snapshot.MAGIC)) == snapshot.MAGIC
+    return iter_records_snapshot(path) if is_snapshot else iter_records_json(path)
+
+
+def user_row(username, user, plant_count):
+    return {
+        "username": username,
+        "points": user["points"],
+        "plant_count": plant_count,
+        "unlocked_areas": "|".join(user["unlocked_areas"]),
+    }
+
+
+def plant_row(username, plant):
+    x, y = plant["position"]
+    return {
+        "username": username,
+        "id": plant["id"],
+        "type": plant["type"],
+        "area": plant["area"],
+        "stage": plant["stage"],
+        "water_level": plant["water_level"],
+        "sun_level": plant["sun_level"],
+        "last_watered": plant["last_watered"],
+        "last_sunned": plant["last_sunned"],
+        "fruits": plant["fruits"],
+        "x": x,
+        "y": y,
+    }
+
+
+class _CsvTable:
+    def __init__(self, path, columns):
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=columns)
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetTable:
+    """按批写入 Parquet，每批写成一个 row group"""
+
+    def __init__(self, path, columns):
+        import pyarrow
+        import pyarrow.parquet
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema(
+            [(name, getattr(pyarrow, COLUMN_TYPES[name])()) for name in columns])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= PARQUET_BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if not self.rows:
+            return
+        table = self.pyarrow.Table.from_pylist(self.rows, schema=self.schema)
+        self.writer.write_table(table)
+        self.rows = []
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+class Summary:
+    """增量累计汇总数据"""
+
+    def __init__(self):
+        self.users = 0
+        self.plants = 0
+        self.stage_counts = {}
+        self.area_counts = {}
+        self.water_total = 0.0
+        self.sun_total = 0.0
+        self.fruits_pending = 0
+        self.plants_with_fruits = 0
+        self.points_total = 0
+        self.points_buckets = [0] * (len(POINTS_BUCKETS) + 1)
+
+    def add_user(self, user):
+        self.users += 1
+        self.points_total += user["points"]
+        for i, bound in enumerate(POINTS_BUCKETS):
+            if user["points"] <= bound:
+                self.points_buckets[i] += 1
+                break
+        else:
+            self.points_buckets[-1] += 1
+
+    def add_plant(self, plant):
+        self.plants += 1
+        self.stage_counts[plant["stage"]] = self.stage_counts.get(plant["stage"], 0) + 1
+        self.area_counts[plant["area"]] = self.area_counts.get(plant["area"], 0) + 1
+        self.water_total += plant["water_level"]
+        self.sun_total += plant["sun_level"]
+        self.fruits_pending += plant["fruits"]
+        if plant["fruits"] > 0:
+            self.plants_with_fruits += 1
+
+    def print(self, out=sys.stdout):
+        print(f"用户数: {self.users}", file=out)
+        print(f"植物数: {self.plants}", file=out)
+        if self.users:
+            print(f"平均积分: {self.points_total / self.users:.1f}", file=out)
+            print("积分分布:", file=out)
+            lower = None
+            for bound, count in zip(POINTS_BUCKETS + (None,), self.points_buckets):
+                if bound is None:
+                    label = f"> {lower}"
+                elif lower is None:
+                    label = f"<= {bound}"
+                else:
+                    label = f"{lower + 1}-{bound}"
+                print(f"  {label}: {count}", file=out)
+                lower = bound
+        if self.plants:
+            print("各阶段植物数:", file=out)
+            for stage in sorted(self.stage_counts):
+                print(f"  阶段{stage}: {self.stage_counts[stage]}", file=out)
+            print("各区域植物数:", file=out)
+            for area in sorted(self.area_counts):
+                print(f"  {area}: {self.area_counts[area]}", file=out)
+            print(f"平均水分: {self.water_total / self.plants:.1f}", file=out)
+            print(f"平均阳光: {self.sun_total / self.plants:.1f}", file=out)
+        print(f"待收获果实: {self.fruits_pending}（{self.plants_with_fruits}株植物）", file=out)
+
+
+def export(source, output_dir=None, output_format="csv", usernames=None,
+           area=None, stage=None, min_points=None, summary=None):
+    """流式导出，filters 为空时导出全部；返回累计的 Summary"""
+    summary = summary or Summary()
+    users_table = plants_table = None
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        table_class = _ParquetTable if output_format == "parquet" else _CsvTable
+        extension = "parquet" if output_format == "parquet" else "csv"
+        users_table = table_class(os.path.join(output_dir, f"users.{extension}"), USER_COLUMNS)
+        plants_table = table_class(os.path.join(output_dir, f"plants.{extension}"), PLANT_COLUMNS)
+
+    def write_plant(username, plant):
+        if area is not None and plant["area"] != area:
+            return
+        if stage is not None and plant["stage"] != stage:
+            return
+        summary.add_plant(plant)
+        if plants_table:
+            plants_table.write(plant_row(username, plant))
+
+    # 积分还没读到时暂存的植物（game_data.json 中 points 通常在 plants 之前，一般用不到）
+    pending = []
+    try:
+        for kind, username, user, item in iter_records(source):
+            if usernames and username not in usernames:
+                continue
+            if kind == "plant":
+                if min_points is None:
+                    write_plant(username, item)
+                elif "points" not in user:
+                    pending.append(item)
+                elif user["points"] >= min_points:
+                    write_plant(username, item)
+                continue
+
+            # 用户结束
+            if min_points is None or user["points"] >= min_points:
+                for plant in pending:
+                    write_plant(username, plant)
+                summary.add_user(user)
+                if users_table:
+                    users_table.write(user_row(username, user, item))
+            pending = []
+    finally:
+        if users_table:
+            users_table.close()
+        if plants_table:
+            plants_table.close()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式导出花园数据")
+    parser.add_argument("source", nargs="?", default="game_data.json",
+                        help="game_data.json 或二进制快照")
+    parser.add_argument("-o", "--output", help="输出目录（写入 users 和 plants 两张表）")
+    parser.add_argument("-f", "--format", choices=["csv", "parquet"], default="csv",
+                        help="输出格式，parquet 需要安装 pyarrow")
+    parser.add_argument("--user", action="append", help="只导出指定用户，可重复")
+    parser.add_argument("--area", help="只导出指定区域的植物")
+    parser.add_argument("--stage", type=int, help="只导出指定阶段的植物")
+    parser.add_argument("--min-points", type=int, help="只导出积分不低于该值的用户")
+    parser.add_argument("--summary", action="store_true", help="打印汇总统计")
+    args = parser.parse_args()
+
+    if not args.output and not args.summary:
+        parser.error("请指定 --output 或 --summary")
+    if args.format == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            parser.error("输出 parquet 需要安装 pyarrow")
+
+    summary = export(args.source, args.output, args.format,
+                     usernames=set(args.user) if args.user else None,
+                     area=args.area, stage=args.stage, min_points=args.min_points)
+    if args.summary:
+        summary.print()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,12 @@ import math
 from pygame.locals import *
 import json
 import os
+import time
 from datetime import datetime, timedelta
 
+import credentials
+import metrics
+
 # 初始化pygame
 pygame.init()
 pygame.mixer.init()
@@ -24,6 +28,33 @@ if not font_path:
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 FPS = 30
+FRUIT_CHANCE = 0.001  # 小树每帧结果的概率
+AUTOSAVE_INTERVAL = 60  # 植物状态没有关键变化时，自动保存的间隔（秒）
+
+# 区域：编号 -> (显示名称, 解锁所需积分)
+AREAS = {
+    "garden": ("花园", 0),
+    "orchard": ("果园", 200),
+    "greenhouse": ("温室", 400),
+}
+
+# 指标导出配置（环境变量）：写入文件的路径、写入间隔（毫秒）、本地 HTTP 端口
+METRICS_FILE = os.environ.get("PLANTGAME_METRICS_FILE")
+METRICS_INTERVAL = int(os.environ.get("PLANTGAME_METRICS_INTERVAL", "10000"))
+METRICS_PORT = os.environ.get("PLANTGAME_METRICS_PORT")
+
+# 运行指标
+SAVE_COUNT = metrics.REGISTRY.counter("plantgame_save_total", "save_data 调用次数")
+SAVE_BYTES = metrics.REGISTRY.counter("plantgame_save_bytes_total", "save_data 写入的字节数")
+SAVE_SECONDS = metrics.REGISTRY.histogram("plantgame_save_seconds", "save_data 耗时（秒）")
+ACTIONS = metrics.REGISTRY.counter("plantgame_actions_total", "成功执行的玩家操作数（按类型）")
+LOGINS = metrics.REGISTRY.counter("plantgame_logins_total", "登录次数（按结果）")
+LOGIN_SECONDS = metrics.REGISTRY.histogram("plantgame_login_seconds", "登录耗时（提交到完成，秒）")
+PLANTS_PER_USER = metrics.REGISTRY.histogram(
+    "plantgame_plants_per_user", "登录成功时用户拥有的植物数",
+    buckets=(0, 1, 5, 10, 25, 50, 100, 200, 500, 1000))
+FRAME_SECONDS = metrics.REGISTRY.histogram("plantgame_frame_seconds", "每帧处理耗时（不含等待，秒）")
+TICK_SECONDS = metrics.REGISTRY.histogram("plantgame_tick_seconds", "每帧植物模拟耗时（秒）")
 
 # 颜色定义
 WHITE = (255, 255, 255)
@@ -92,11 +123,40 @@ def distance(p1, p2):
     """计算两点之间的距离"""
     return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])** 2)
 
+def replay_minutes(last_time, now, ticks):
+    """ticks 帧（最后一帧在 now，间隔 1/FPS 秒）中「距 last_time 的分钟数」之和
+
+    每帧的衰减量与该值成正比，多帧补算时用它一次算出逐帧衰减的总量。
+    """
+    elapsed = (now - last_time).total_seconds()
+    if elapsed < 0:
+        return 0
+    frame = 1 / FPS
+    # 只累计在 last_time 之后的帧（从 now 往前数的前 frames 帧）
+    frames = min(ticks, int(elapsed * FPS) + 1)
+    return (frames * elapsed - frame * frames * (frames - 1) / 2) / 60
+
+def missed_fruits(ticks):
+    """按泊松分布估算 ticks 帧内结出的果实数（最多5个）"""
+    limit = math.exp(-ticks * FRUIT_CHANCE)
+    count = 0
+    product = random.random()
+    while product > limit and count < 5:
+        count += 1
+        product *= random.random()
+    return count
+
 # 游戏数据管理
 class GameData:
     def __init__(self):
         self.users = {}
         self.current_user = None
+        self.current_area = "garden"
+        self.suspended_areas = {}  # 区域 -> 暂停模拟的时间
+        self.last_save_time = time.monotonic()
+        self._area_index = None    # 当前用户按区域分组的植物
+        self._area_index_user = None
+        self.credentials = credentials.CredentialService()
         self.load_data()
         
     def load_data(self):
@@ -111,36 +171,100 @@ class GameData:
     
     def save_data(self):
         """保存游戏数据到文件"""
+        start = time.perf_counter()
         data = {
             "users": self.users
         }
-        with open("game_data.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        content = json.dumps(data, ensure_ascii=False, indent=4).encode("utf-8")
+        with open("game_data.json", "wb") as f:
+            f.write(content)
+        SAVE_COUNT.inc()
+        SAVE_BYTES.inc(len(content))
+        SAVE_SECONDS.observe(time.perf_counter() - start)
+        self.last_save_time = time.monotonic()
     
     def register_user(self, username, password):
-        """注册新用户"""
+        """注册新用户（同步，会等待密码哈希完成）"""
+        future = self.register_user_async(username, password)
+        try:
+            password_hash = future.result()
+        except Exception as e:
+            print(f"计算密码哈希失败: {e}")
+            return False, "注册失败，请重试"
+        return self.finish_register(username, password, password_hash)
+    
+    def register_user_async(self, username, password):
+        """开始注册：在线程池中计算密码哈希，返回 Future，完成后在主线程调用 finish_register"""
         if username in self.users:
+            return credentials.completed_future(None)
+        return self.credentials.hash_async(password)
+    
+    def finish_register(self, username, password, password_hash):
+        """用计算好的密码哈希完成注册"""
+        if password_hash is None or username in self.users:
             return False, "用户名已存在"
         
         # 初始化新用户数据
         self.users[username] = {
-            "password": password,
+            "password": password_hash,
             "points": 100,  # 初始积分
             "plants": [],
             "unlocked_areas": ["garden"]  # 初始解锁区域
         }
+        self.credentials.remember(username, password_hash, password)
         self.save_data()
         return True, "注册成功"
     
     def login_user(self, username, password):
-        """用户登录"""
+        """用户登录（同步，会等待密码校验完成）"""
+        start = time.perf_counter()
+        future = self.login_user_async(username, password)
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"校验密码失败: {e}")
+            LOGINS.inc(result="failure")
+            LOGIN_SECONDS.observe(time.perf_counter() - start)
+            return False, "登录失败，请重试"
+        outcome = self.finish_login(username, password, result)
+        LOGIN_SECONDS.observe(time.perf_counter() - start)
+        return outcome
+    
+    def login_user_async(self, username, password):
+        """开始登录：在线程池中校验密码，返回 Future，完成后在主线程调用 finish_login
+
+        最近登录过的会话直接命中缓存，返回已完成的 Future。
+        """
+        if username not in self.users:
+            return credentials.completed_future((False, None))
+        stored = self.users[username]["password"]
+        return self.credentials.verify_async(username, stored, password)
+    
+    def finish_login(self, username, password, result):
+        """根据校验结果完成登录，旧版明文密码在此换成哈希保存"""
         if username not in self.users:
+            LOGINS.inc(result="failure")
             return False, "用户名不存在"
         
-        if self.users[username]["password"] != password:
+        ok, new_hash = result
+        if not ok:
+            LOGINS.inc(result="failure")
             return False, "密码错误"
         
+        user_data = self.users[username]
+        if new_hash:
+            user_data["password"] = new_hash
+            self.save_data()
+        self.credentials.remember(username, user_data["password"], password)
+        
+        LOGINS.inc(result="success")
+        PLANTS_PER_USER.observe(len(self.users[username]["plants"]))
         self.current_user = username
+        self.current_area = "garden"
+        # 其他已解锁区域从登录时开始暂停，进入时补算
+        now = datetime.now()
+        self.suspended_areas = {area: now for area in user_data["unlocked_areas"]
+                                if area != self.current_area}
         return True, "登录成功"
     
     def add_plant(self, plant_type, area="garden"):
@@ -158,6 +282,9 @@ class GameData:
         if area not in user_data["unlocked_areas"]:
             return False, "该区域未解锁"
         
+        # 暂停中的区域先补算，新植物的时间戳不会早于补算时间
+        self._prepare_area(area)
+        
         # 扣除积分
         user_data["points"] -= 50
         
@@ -177,7 +304,9 @@ class GameData:
             "position": (random.randint(100, SCREEN_WIDTH-100), 
                          random.randint(200, SCREEN_HEIGHT-200))
         })
+        self._area_index = None
         
+        ACTIONS.inc(action="plant")
         self.save_data()
         return True, "植物已种植"
     
@@ -187,6 +316,90 @@ class GameData:
             return []
         return self.users[self.current_user]["plants"]
     
+    def get_area_plants(self, area=None):
+        """获取当前用户某个区域（默认当前区域）的植物"""
+        if not self.current_user:
+            return []
+        if self._area_index is None or self._area_index_user != self.current_user:
+            self._area_index = {}
+            for plant in self.users[self.current_user]["plants"]:
+                self._area_index.setdefault(plant.get("area", "garden"), []).append(plant)
+            self._area_index_user = self.current_user
+        return self._area_index.get(area or self.current_area, [])
+    
+    def get_unlocked_areas(self):
+        """获取当前用户已解锁的区域"""
+        if not self.current_user:
+            return []
+        return self.users[self.current_user]["unlocked_areas"]
+    
+    def unlock_area(self, area):
+        """花费积分解锁新区域"""
+        if not self.current_user:
+            return False, "请先登录"
+        if area not in AREAS:
+            return False, "区域不存在"
+            
+        user_data = self.users[self.current_user]
+        name, cost = AREAS[area]
+        if area in user_data["unlocked_areas"]:
+            return False, f"{name}已解锁"
+        if user_data["points"] < cost:
+            return False, f"积分不足，解锁{name}需要{cost}积分"
+        
+        user_data["points"] -= cost
+        user_data["unlocked_areas"].append(area)
+        if area != self.current_area:
+            self.suspended_areas[area] = datetime.now()
+        ACTIONS.inc(action="unlock_area")
+        self.save_data()
+        return True, f"已解锁{name}"
+    
+    def switch_area(self, area):
+        """切换当前区域：离开的区域暂停模拟，进入的区域补算暂停期间的变化"""
+        if not self.current_user:
+            return False, "请先登录"
+        if area not in self.users[self.current_user]["unlocked_areas"]:
+            return False, "该区域未解锁"
+        
+        name = AREAS.get(area, (area, 0))[0]
+        if area == self.current_area:
+            return True, f"已在{name}"
+        
+        now = datetime.now()
+        self.suspended_areas[self.current_area] = now
+        self.current_area = area
+        ACTIONS.inc(action="switch_area")
+        self.catch_up_area(area, now)
+        return True, f"已进入{name}"
+    
+    def catch_up_area(self, area, now=None, save=True):
+        """补算区域暂停期间错过的帧，返回是否进行了补算
+
+        save=False 时不保存，由调用方在之后统一保存。
+        """
+        suspended_at = self.suspended_areas.pop(area, None)
+        if suspended_at is None or not self.current_user:
+            return False
+        now = now or datetime.now()
+        missed_ticks = int((now - suspended_at).total_seconds() * FPS)
+        self._simulate_plants(self.get_area_plants(area), now, max(1, missed_ticks))
+        if save:
+            self.save_data()
+        return True
+    
+    def _prepare_area(self, area):
+        """修改某个区域的植物前调用：暂停中的区域先补算（不保存），之后继续保持暂停
+
+        返回是否进行了补算，调用方负责保存。
+        """
+        if area not in self.suspended_areas:
+            return False
+        now = datetime.now()
+        caught_up = self.catch_up_area(area, now, save=False)
+        self.suspended_areas[area] = now
+        return caught_up
+    
     def get_user_points(self):
         """获取当前用户的积分"""
         if not self.current_user:
@@ -194,21 +407,33 @@ class GameData:
         return self.users[self.current_user]["points"]
     
     def update_plant_status(self):
-        """更新所有植物的状态（水分和阳光会随时间减少）"""
+        """更新当前区域植物的状态（水分和阳光会随时间减少），其他区域暂停"""
         if not self.current_user:
             return
-            
+        
+        start = time.perf_counter()
+        changed = self._simulate_plants(self.get_area_plants(), datetime.now())
+        TICK_SECONDS.observe(time.perf_counter() - start)
+        # 只在成长/结果时立即保存，水分和阳光的变化按间隔保存
+        if changed or time.monotonic() - self.last_save_time >= AUTOSAVE_INTERVAL:
+            self.save_data()
+    
+    def _simulate_plants(self, plants, now, ticks=1):
+        """模拟植物状态变化，ticks 为需要模拟的帧数（用于补算暂停的区域）
+
+        返回是否有植物成长或结果。
+        """
         user_data = self.users[self.current_user]
-        now = datetime.now()
+        changed = False
         
-        for plant in user_data["plants"]:
-            # 计算上次浇水到现在的时间
+        for plant in plants:
+            # 计算上次浇水到现在的时间（多帧时为逐帧累计值）
             last_watered = datetime.fromisoformat(plant["last_watered"])
-            water_time_diff = (now - last_watered).total_seconds() / 60  # 分钟
+            water_time_diff = replay_minutes(last_watered, now, ticks)
             
             # 计算上次晒太阳到现在的时间
             last_sunned = datetime.fromisoformat(plant["last_sunned"])
-            sun_time_diff = (now - last_sunned).total_seconds() / 60  # 分钟
+            sun_time_diff = replay_minutes(last_sunned, now, ticks)
             
             # 水分和阳光随时间减少，第一阶段减少更快
             if plant["stage"] == 1:  # 树苗阶段
@@ -223,63 +448,148 @@ class GameData:
                 plant["stage"] = 2
                 # 成长奖励积分
                 user_data["points"] += 100
-                self.save_data()
+                changed = True
             
             # 检查是否结果
-            if plant["stage"] == 2 and random.random() < 0.001:  # 小概率结果
-                plant["fruits"] = min(5, plant["fruits"] + 1)
-        
-        self.save_data()
+            if plant["stage"] == 2 and plant["fruits"] < 5:
+                if ticks == 1:
+                    gained = 1 if random.random() < FRUIT_CHANCE else 0  # 小概率结果
+                else:
+                    gained = missed_fruits(ticks)
+                if gained:
+                    plant["fruits"] = min(5, plant["fruits"] + gained)
+                    changed = True
+        
+        return changed
+    
+    def _plant_area(self, plant_id):
+        """查找当前用户某株植物所在的区域，不存在时返回 None"""
+        for plant in self.get_user_plants():
+            if plant["id"] == plant_id:
+                return plant.get("area", "garden")
+        return None
     
     def water_plant(self, plant_id):
         """给植物浇水"""
         if not self.current_user:
             return False, "请先登录"
-            
-        user_data = self.users[self.current_user]
-        
-        for plant in user_data["plants"]:
-            if plant["id"] == plant_id:
-                plant["water_level"] = min(100, plant["water_level"] + 30)
-                plant["last_watered"] = datetime.now().isoformat()
-                self.save_data()
-                return True, "浇水成功"
-        
-        return False, "植物不存在"
+        area = self._plant_area(plant_id)
+        if area is None:
+            return False, "植物不存在"
+        success, msg, _ = self.water_plants({plant_id}, area=area)
+        return success, msg
     
     def sun_plant(self, plant_id):
         """给植物晒太阳"""
         if not self.current_user:
             return False, "请先登录"
-            
-        user_data = self.users[self.current_user]
-        
-        for plant in user_data["plants"]:
-            if plant["id"] == plant_id:
-                plant["sun_level"] = min(100, plant["sun_level"] + 30)
-                plant["last_sunned"] = datetime.now().isoformat()
-                self.save_data()
-                return True, "晒太阳成功"
-        
-        return False, "植物不存在"
+        area = self._plant_area(plant_id)
+        if area is None:
+            return False, "植物不存在"
+        success, msg, _ = self.sun_plants({plant_id}, area=area)
+        return success, msg
     
     def harvest_fruits(self, plant_id):
         """收获果实（通过摇晃动作触发）"""
         if not self.current_user:
             return False, "请先登录"
-            
+        area = self._plant_area(plant_id)
+        if area is None:
+            return False, "该植物没有可收获的果实"
+        success, msg, _ = self.harvest_plants({plant_id}, area=area)
+        return success, msg
+
+    def select_plants(self, plant_ids=None, predicate=None, area=None):
+        """按编号集合和/或条件筛选当前用户的植物（一次遍历），可限定区域"""
+        if not self.current_user:
+            return []
+        if plant_ids is not None:
+            plant_ids = set(plant_ids)
+
+        plants = self.get_area_plants(area) if area else self.users[self.current_user]["plants"]
+        selected = []
+        for plant in plants:
+            if plant_ids is not None and plant["id"] not in plant_ids:
+                continue
+            if predicate is not None and not predicate(plant):
+                continue
+            selected.append(plant)
+        return selected
+
+    def _apply_bulk(self, plant_ids, predicate, area, action, action_name, done_text):
+        """对某个区域（默认当前区域）中筛选出的植物逐个执行操作，最后只保存一次
+
+        返回 (是否有植物操作成功, 汇总消息, {植物编号: (是否成功, 消息)})
+        """
+        if not self.current_user:
+            return False, "请先登录", {}
+
+        area = area or self.current_area
+        caught_up = self._prepare_area(area)
+
         user_data = self.users[self.current_user]
-        
-        for plant in user_data["plants"]:
-            if plant["id"] == plant_id and plant["fruits"] > 0:
-                fruits_harvested = plant["fruits"]
-                plant["fruits"] = 0
-                # 果实可以兑换积分
-                user_data["points"] += fruits_harvested * 10
-                self.save_data()
-                return True, f"收获了{fruits_harvested}个果实，获得{fruits_harvested * 10}积分"
-        
-        return False, "该植物没有可收获的果实"
+        results = {}
+        for plant in self.select_plants(plant_ids, area=area):
+            if predicate is not None and not predicate(plant):
+                # 指定了编号但不满足条件的植物
+                if plant_ids is not None:
+                    results[plant["id"]] = (False, "不符合条件")
+                continue
+            results[plant["id"]] = action(user_data, plant)
+
+        # 指定了编号但在该区域找不到的植物
+        if plant_ids is not None:
+            for plant_id in plant_ids:
+                if plant_id not in results:
+                    results[plant_id] = (False, "植物不存在")
+
+        succeeded = sum(1 for ok, _ in results.values() if ok)
+        if succeeded:
+            ACTIONS.inc(succeeded, action=action_name)
+        if succeeded or caught_up:
+            self.save_data()
+
+        if len(results) == 1:
+            success, msg = next(iter(results.values()))
+            return success, msg, results
+        if not results:
+            return False, "没有符合条件的植物", results
+        return succeeded > 0, f"{done_text}：成功{succeeded}株，共{len(results)}株", results
+
+    def water_plants(self, plant_ids=None, predicate=None, area=None):
+        """批量浇水，例如 predicate=lambda p: p["water_level"] < 30"""
+        now = datetime.now().isoformat()
+
+        def water(user_data, plant):
+            plant["water_level"] = min(100, plant["water_level"] + 30)
+            plant["last_watered"] = now
+            return True, "浇水成功"
+
+        return self._apply_bulk(plant_ids, predicate, area, water, "water", "批量浇水")
+
+    def sun_plants(self, plant_ids=None, predicate=None, area=None):
+        """批量晒太阳"""
+        now = datetime.now().isoformat()
+
+        def sun(user_data, plant):
+            plant["sun_level"] = min(100, plant["sun_level"] + 30)
+            plant["last_sunned"] = now
+            return True, "晒太阳成功"
+
+        return self._apply_bulk(plant_ids, predicate, area, sun, "sun", "批量晒太阳")
+
+    def harvest_plants(self, plant_ids=None, predicate=None, area=None):
+        """批量收获果实，例如 predicate=lambda p: p["fruits"] > 0"""
+        def harvest(user_data, plant):
+            fruits_harvested = plant["fruits"]
+            if fruits_harvested <= 0:
+                return False, "该植物没有可收获的果实"
+            plant["fruits"] = 0
+            # 果实可以兑换积分
+            user_data["points"] += fruits_harvested * 10
+            return True, f"收获了{fruits_harvested}个果实，获得{fruits_harvested * 10}积分"
+
+        return self._apply_bulk(plant_ids, predicate, area, harvest, "harvest", "批量收获")
 
 # 重力感应模拟器（实际设备上可使用传感器数据）
 class GravitySensor:
@@ -502,11 +812,19 @@ class PlantGame:
         self.data = GameData()
         self.state_manager = GameState()
         self.gravity_sensor = GravitySensor()
-        self.selected_plant_id = None
+        self.selected_plant_ids = set()
+        self.pending_auth = None  # 正在进行的登录/注册：(类型, 用户名, 密码, Future, 开始时间)
+        self.next_metrics_write = 0
+        self.drag_start = None  # 拖动框选的起点
+        self.drag_end = None
         
         # 初始化图像
         Images.init()
         
+        # 启动指标 HTTP 端口
+        if METRICS_PORT:
+            metrics.start_http_server(int(METRICS_PORT))
+        
         # 创建UI元素
         self.create_ui_elements()
         
@@ -559,15 +877,33 @@ class PlantGame:
             50, 230, 120, 40, "收获果实", action="harvest_fruits"
         )
         
+        # 按条件批量选择
+        self.select_thirsty_button = Button(
+            50, 290, 120, 40, "选择缺水", action="select_thirsty"
+        )
+        
+        self.select_fruiting_button = Button(
+            50, 350, 120, 40, "选择有果", action="select_fruiting"
+        )
+        
         self.logout_button = Button(
             SCREEN_WIDTH - 150, 50, 100, 40, "退出登录", action="logout"
         )
+        
+        # 区域切换/解锁按钮
+        self.area_buttons = {}
+        for i, area in enumerate(AREAS):
+            self.area_buttons[area] = Button(
+                200 + i * 140, SCREEN_HEIGHT - 60, 130, 40, AREAS[area][0], action=area
+            )
     
     def handle_events(self):
         """处理游戏事件"""
         for event in pygame.event.get():
             if event.type == QUIT:
                 self.data.save_data()
+                if METRICS_FILE:
+                    metrics.write_textfile(METRICS_FILE)
                 pygame.quit()
                 sys.exit()
             
@@ -579,9 +915,9 @@ class PlantGame:
             # 处理按钮点击
             self.handle_button_click(event)
             
-            # 处理植物点击
-            if self.state_manager.state == "game" and event.type == MOUSEBUTTONDOWN:
-                self.handle_plant_click(event.pos)
+            # 处理植物点击和拖动框选
+            if self.state_manager.state == "game":
+                self.handle_selection_event(event)
         
         # 更新重力传感器
         self.gravity_sensor.update()
@@ -599,48 +935,131 @@ class PlantGame:
         
         elif self.state_manager.state == "game":
             if self.plant_tree_button.is_clicked(event):
-                success, msg = self.data.add_plant("普通树")
+                success, msg = self.data.add_plant("普通树", self.data.current_area)
                 self.state_manager.show_message(msg)
-            elif self.water_button.is_clicked(event) and self.selected_plant_id is not None:
-                success, msg = self.data.water_plant(self.selected_plant_id)
+            elif self.water_button.is_clicked(event) and self.selected_plant_ids:
+                success, msg, results = self.data.water_plants(self.selected_plant_ids)
                 self.state_manager.show_message(msg)
-            elif self.sun_button.is_clicked(event) and self.selected_plant_id is not None:
-                success, msg = self.data.sun_plant(self.selected_plant_id)
+            elif self.sun_button.is_clicked(event) and self.selected_plant_ids:
+                success, msg, results = self.data.sun_plants(self.selected_plant_ids)
                 self.state_manager.show_message(msg)
-            elif self.harvest_button.is_clicked(event) and self.selected_plant_id is not None:
-                success, msg = self.data.harvest_fruits(self.selected_plant_id)
+            elif self.harvest_button.is_clicked(event) and self.selected_plant_ids:
+                success, msg, results = self.data.harvest_plants(self.selected_plant_ids)
                 self.state_manager.show_message(msg)
+            elif self.select_thirsty_button.is_clicked(event):
+                self.select_by_predicate(lambda p: p["water_level"] < 30, "缺水")
+            elif self.select_fruiting_button.is_clicked(event):
+                self.select_by_predicate(lambda p: p["fruits"] > 0, "有果实")
             elif self.logout_button.is_clicked(event):
+                self.data.save_data()
                 self.data.current_user = None
                 self.state_manager.set_state("login")
-                self.selected_plant_id = None
+                self.selected_plant_ids = set()
                 self.state_manager.show_message("已退出登录")
+            else:
+                for area, button in self.area_buttons.items():
+                    if button.is_clicked(event):
+                        self.handle_area_click(area)
+                        break
+    
+    def handle_area_click(self, area):
+        """切换区域，未解锁的区域先尝试解锁"""
+        if area not in self.data.get_unlocked_areas():
+            success, msg = self.data.unlock_area(area)
+            if not success:
+                self.state_manager.show_message(msg)
+                return
+        
+        success, msg = self.data.switch_area(area)
+        if success:
+            self.selected_plant_ids = set()
+        self.state_manager.show_message(msg)
+    
+    def is_over_button(self, pos):
+        """检查位置是否在游戏界面的按钮上"""
+        buttons = [self.plant_tree_button, self.water_button, self.sun_button,
+                   self.harvest_button, self.select_thirsty_button,
+                   self.select_fruiting_button, self.logout_button]
+        buttons.extend(self.area_buttons.values())
+        return any(button.rect.collidepoint(pos) for button in buttons)
+    
+    def handle_selection_event(self, event):
+        """处理植物点击选择和拖动框选"""
+        if event.type == MOUSEBUTTONDOWN and event.button == 1:
+            if self.is_over_button(event.pos):
+                return
+            self.drag_start = event.pos
+            self.drag_end = event.pos
+        elif event.type == MOUSEMOTION and self.drag_start is not None:
+            self.drag_end = event.pos
+        elif event.type == MOUSEBUTTONUP and event.button == 1 and self.drag_start is not None:
+            self.drag_end = event.pos
+            rect = self.get_drag_rect()
+            self.drag_start = None
+            self.drag_end = None
+            if rect.width > 5 or rect.height > 5:
+                self.handle_drag_select(rect)
+            else:
+                self.handle_plant_click(event.pos)
+    
+    def get_drag_rect(self):
+        """获取当前拖动框选的矩形"""
+        x1, y1 = self.drag_start
+        x2, y2 = self.drag_end
+        return pygame.Rect(min(x1, x2), min(y1, y2), abs(x2 - x1), abs(y2 - y1))
     
     def handle_plant_click(self, pos):
-        """处理植物点击事件"""
-        plants = self.data.get_user_plants()
-        for plant_data in plants:
+        """处理植物点击事件（按住Ctrl或Shift可追加/取消选择）"""
+        additive = pygame.key.get_mods() & (KMOD_CTRL | KMOD_SHIFT)
+        plants = self.data.get_area_plants()
+        for plant_data in reversed(plants):
             plant = Plant(plant_data)
             if plant.is_clicked(pos):
-                self.selected_plant_id = plant.id
-                self.state_manager.show_message(f"已选择植物 #{plant.id}")
+                if not additive:
+                    self.selected_plant_ids = {plant.id}
+                elif plant.id in self.selected_plant_ids:
+                    self.selected_plant_ids.discard(plant.id)
+                else:
+                    self.selected_plant_ids.add(plant.id)
+                self.state_manager.show_message(f"已选择{len(self.selected_plant_ids)}株植物")
                 return
         
         # 如果点击了空白处，取消选择
-        self.selected_plant_id = None
-        self.state_manager.show_message("已取消选择")
+        if not additive:
+            self.selected_plant_ids = set()
+            self.state_manager.show_message("已取消选择")
+    
+    def handle_drag_select(self, rect):
+        """选择框内的所有植物"""
+        selected = {plant["id"] for plant in self.data.select_plants(
+            predicate=lambda p: rect.collidepoint(p["position"]),
+            area=self.data.current_area)}
+        if pygame.key.get_mods() & (KMOD_CTRL | KMOD_SHIFT):
+            self.selected_plant_ids |= selected
+        else:
+            self.selected_plant_ids = selected
+        self.state_manager.show_message(f"已选择{len(self.selected_plant_ids)}株植物")
+    
+    def select_by_predicate(self, predicate, label):
+        """按条件选择植物"""
+        self.selected_plant_ids = {plant["id"] for plant in self.data.select_plants(
+            predicate=predicate, area=self.data.current_area)}
+        if self.selected_plant_ids:
+            self.state_manager.show_message(f"已选择{len(self.selected_plant_ids)}株{label}的植物")
+        else:
+            self.state_manager.show_message(f"没有{label}的植物")
     
     def handle_gravity_events(self):
         """处理重力感应事件"""
-        if self.state_manager.state == "game" and self.selected_plant_id is not None:
+        if self.state_manager.state == "game" and self.selected_plant_ids:
             # 摇晃动作 - 收获果实
             if self.gravity_sensor.shake_detected:
-                success, msg = self.data.harvest_fruits(self.selected_plant_id)
+                success, msg, results = self.data.harvest_plants(self.selected_plant_ids)
                 self.state_manager.show_message(msg)
             
             # 倾倒动作 - 浇水
             if self.gravity_sensor.pour_detected:
-                success, msg = self.data.water_plant(self.selected_plant_id)
+                success, msg, results = self.data.water_plants(self.selected_plant_ids)
                 self.state_manager.show_message(msg)
     
     def process_login(self):
@@ -652,14 +1071,7 @@ class PlantGame:
             self.state_manager.show_message("请输入用户名和密码")
             return
         
-        success, msg = self.data.login_user(username, password)
-        self.state_manager.show_message(msg)
-        
-        if success:
-            self.state_manager.set_state("game")
-            # 清空输入框
-            self.username_input.text = ""
-            self.password_input.text = ""
+        self.start_auth("login", username, password)
     
     def process_register(self):
         """处理注册逻辑"""
@@ -670,12 +1082,57 @@ class PlantGame:
             self.state_manager.show_message("请输入用户名和密码")
             return
         
-        success, msg = self.data.register_user(username, password)
+        self.start_auth("register", username, password)
+    
+    def start_auth(self, kind, username, password):
+        """提交登录/注册，密码哈希在后台线程中进行，界面显示等待状态"""
+        if kind == "login":
+            future = self.data.login_user_async(username, password)
+        else:
+            future = self.data.register_user_async(username, password)
+        self.pending_auth = (kind, username, password, future, time.perf_counter())
+        self.login_button.active = False
+        self.register_button.active = False
+        self.state_manager.show_message("正在登录..." if kind == "login" else "正在注册...")
+        # 命中缓存时已经完成，不必等到下一帧
+        self.poll_auth()
+    
+    def poll_auth(self):
+        """检查后台的登录/注册是否完成，完成后在主线程应用结果"""
+        if self.pending_auth is None or not self.pending_auth[3].done():
+            return
+        
+        kind, username, password, future, start = self.pending_auth
+        self.pending_auth = None
+        self.login_button.active = True
+        self.register_button.active = True
+        
+        # 工作线程中的异常不能让主循环崩溃
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"后台{'登录' if kind == 'login' else '注册'}出错: {e}")
+            if kind == "login":
+                LOGINS.inc(result="failure")
+                LOGIN_SECONDS.observe(time.perf_counter() - start)
+                self.state_manager.show_message("登录失败，请重试")
+            else:
+                self.state_manager.show_message("注册失败，请重试")
+            return
+        
+        if kind == "register":
+            success, msg = self.data.finish_register(username, password, result)
+            self.state_manager.show_message(msg)
+            if success:
+                # 注册成功后自动登录（会话已缓存，不需要再次哈希）
+                self.start_auth("login", username, password)
+            return
+        
+        success, msg = self.data.finish_login(username, password, result)
+        LOGIN_SECONDS.observe(time.perf_counter() - start)
         self.state_manager.show_message(msg)
         
         if success:
-            # 注册成功后自动登录
-            self.data.login_user(username, password)
             self.state_manager.set_state("game")
             # 清空输入框
             self.username_input.text = ""
@@ -683,6 +1140,7 @@ class PlantGame:
     
     def update(self):
         """更新游戏状态"""
+        self.poll_auth()
         if self.state_manager.state == "game":
             self.data.update_plant_status()
     
@@ -703,6 +1161,8 @@ class PlantGame:
         self.register_button.draw()
         
         # 根据当前状态更改按钮文本
+        if self.pending_auth is not None:
+            draw_text("请稍候...", get_font(20), GRAY, SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 120)
         if self.state_manager.state == "login":
             self.login_button.text = "登录"
             self.register_button.text = "前往注册"
@@ -717,16 +1177,27 @@ class PlantGame:
         # 绘制用户信息
         draw_text(f"用户: {self.data.current_user}", get_font(20), BLACK, 100, 20, center=False)
         draw_text(f"积分: {self.data.get_user_points()}", get_font(20), BLACK, SCREEN_WIDTH - 100, 20)
+        draw_text(f"区域: {AREAS[self.data.current_area][0]}", get_font(20), BLACK, SCREEN_WIDTH//2, 20)
         
         # 绘制按钮
         self.plant_tree_button.draw()
         self.water_button.draw()
         self.sun_button.draw()
         self.harvest_button.draw()
+        self.select_thirsty_button.draw()
+        self.select_fruiting_button.draw()
         self.logout_button.draw()
         
-        # 绘制植物
-        plants = self.data.get_user_plants()
+        # 绘制区域按钮（当前区域高亮，未解锁区域显示所需积分）
+        unlocked_areas = self.data.get_unlocked_areas()
+        for area, button in self.area_buttons.items():
+            name, cost = AREAS[area]
+            button.text = name if area in unlocked_areas else f"解锁{name}({cost})"
+            button.color = GREEN if area == self.data.current_area else GRAY
+            button.draw()
+        
+        # 只绘制当前区域的植物
+        plants = self.data.get_area_plants()
         if not plants:
             draw_text("还没有植物，点击'种植植物'开始吧！", get_font(20), GRAY, 
                      SCREEN_WIDTH//2, SCREEN_HEIGHT//2)
@@ -736,19 +1207,24 @@ class PlantGame:
                 plant.draw()
                 
                 # 如果是选中的植物，绘制选中框
-                if plant.id == self.selected_plant_id:
+                if plant.id in self.selected_plant_ids:
                     x, y = plant.position
                     width = 50 if plant.stage == 1 else 80
                     height = 100 if plant.stage == 1 else 150
                     pygame.draw.rect(screen, RED, 
                                     (x - width//2, y - height//2, width, height), 3)
         
+        # 绘制拖动框选
+        if self.drag_start is not None:
+            pygame.draw.rect(screen, BLUE, self.get_drag_rect(), 1)
+        
         # 绘制操作提示
         draw_text("操作提示:", get_font(16), BLACK, SCREEN_WIDTH - 200, 100, center=False)
         draw_text("- 点击植物进行选择", get_font(14), BLACK, SCREEN_WIDTH - 200, 130, center=False)
         draw_text("- 方向键模拟重力感应", get_font(14), BLACK, SCREEN_WIDTH - 200, 155, center=False)
         draw_text("- 左右快速移动模拟摇晃（收获）", get_font(14), BLACK, SCREEN_WIDTH - 200, 180, center=False)
         draw_text("- 上下倾斜模拟浇水", get_font(14), BLACK, SCREEN_WIDTH - 200, 205, center=False)
+        draw_text("- 拖动框选多株，Ctrl/Shift追加", get_font(14), BLACK, SCREEN_WIDTH - 200, 230, center=False)
     
     def draw(self):
         """绘制游戏画面"""
@@ -765,10 +1241,22 @@ class PlantGame:
     def run(self):
         """运行游戏主循环"""
         while True:
+            start = time.perf_counter()
             self.handle_events()
             self.update()
             self.draw()
+            FRAME_SECONDS.observe(time.perf_counter() - start)
+            self.write_metrics()
             clock.tick(FPS)
+    
+    def write_metrics(self):
+        """按间隔把指标写入文件"""
+        if not METRICS_FILE:
+            return
+        now = pygame.time.get_ticks()
+        if now >= self.next_metrics_write:
+            metrics.write_textfile(METRICS_FILE)
+            self.next_metrics_write = now + METRICS_INTERVAL
 
 # 启动游戏
 if __name__ == "__main__":
@@ -0,0 +1,319 @@
+# -*- coding: UTF-8 -*-
+"""游戏存档的二进制快照格式
+
+文件布局（小端序）：
+    文件头    HEADER
+    字符串表  每个字符串一条 (偏移, 长度) 记录，后接 UTF-8 字节块
+    区域表    每个用户已解锁区域的字符串编号 (uint32)
+    用户记录  定长 USER_RECORD，按用户名排序，记录中保存植物块的字节偏移
+    植物记录  定长 PLANT_RECORD，同一用户的植物连续存放
+
+用户名、密码、植物类型和区域名都存入字符串表（去重），时间戳存为 epoch 秒（浮点）。
+读取时通过 mmap 映射文件，按偏移直接访问某个用户的植物块，不需要解析整个文件。
+"""
+import argparse
+import bisect
+import json
+import mmap
+import struct
+from datetime import datetime
+
+MAGIC = b"PGSN"
+VERSION = 1
+
+# magic, 版本, 保留, 用户数, 植物数, 字符串数, 区域数,
+# 字符串表偏移, 区域表偏移, 用户表偏移, 植物表偏移
+HEADER = struct.Struct("<4sHHIIIIQQQQ")
+STRING_ENTRY = struct.Struct("<II")
+AREA_ENTRY = struct.Struct("<I")
+# 用户名, 密码, 积分, 区域起始, 区域数, 植物块偏移, 植物数
+USER_RECORD = struct.Struct("<IIqIIQI")
+# 编号, 类型, 区域, 阶段, 果实数, 水分, 阳光, 上次浇水, 上次晒太阳, 位置x, 位置y
+PLANT_RECORD = struct.Struct("<IIIHHddddii")
+
+
+class SnapshotError(Exception):
+    """快照文件格式错误"""
+
+
+def _to_epoch(value):
+    """ISO-8601 时间字符串转换为 epoch 秒"""
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _from_epoch(value):
+    """epoch 秒转换为 ISO-8601 时间字符串"""
+    return datetime.fromtimestamp(value).isoformat()
+
+
+class _StringTable:
+    """字符串驻留表，相同字符串只存一份"""
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def intern(self, text):
+        if text not in self.ids:
+            self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        return self.ids[text]
+
+
+def dump_snapshot(users, path):
+    """把 users 字典（与 game_data.json 中结构相同）写成二进制快照"""
+    strings = _StringTable()
+    area_ids = []
+    user_rows = []
+    plant_rows = []
+
+    for username in sorted(users):
+        user = users[username]
+        area_start = len(area_ids)
+        for area in user.get("unlocked_areas", []):
+            area_ids.append(strings.intern(area))
+        plant_start = len(plant_rows)
+        for plant in user.get("plants", []):
+            x, y = plant["position"]
+            plant_rows.append((
+                plant["id"],
+                strings.intern(plant["type"]),
+                strings.intern(plant["area"]),
+                plant["stage"],
+                plant["fruits"],
+                plant["water_level"],
+                plant["sun_level"],
+                _to_epoch(plant["last_watered"]),
+                _to_epoch(plant["last_sunned"]),
+                x,
+                y,
+            ))
+        user_rows.append((
+            strings.intern(username),
+            strings.intern(user["password"]),
+            user["points"],
+            area_start,
+            len(area_ids) - area_start,
+            plant_start,
+            len(plant_rows) - plant_start,
+        ))
+
+    encoded = [s.encode("utf-8") for s in strings.strings]
+    string_offset = HEADER.size
+    blob_offset = string_offset + STRING_ENTRY.size * len(encoded)
+    area_offset = blob_offset + sum(len(b) for b in encoded)
+    user_offset = area_offset + AREA_ENTRY.size * len(area_ids)
+    plant_offset = user_offset + USER_RECORD.size * len(user_rows)
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(user_rows), len(plant_rows),
+                            len(encoded), len(area_ids), string_offset,
+                            area_offset, user_offset, plant_offset))
+        position = blob_offset
+        for data in encoded:
+            f.write(STRING_ENTRY.pack(position, len(data)))
+            position += len(data)
+        for data in encoded:
+            f.write(data)
+        for area_id in area_ids:
+            f.write(AREA_ENTRY.pack(area_id))
+        for row in user_rows:
+            # 植物块偏移由植物序号换算为文件内字节偏移
+            row = row[:5] + (plant_offset + row[5] * PLANT_RECORD.size,) + row[6:]
+            f.write(USER_RECORD.pack(*row))
+        for row in plant_rows:
+            f.write(PLANT_RECORD.pack(*row))
+
+
+class Snapshot:
+    """通过 mmap 只读访问二进制快照"""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise SnapshotError("快照文件为空")
+        self._view = memoryview(self._mmap)
+        if len(self._view) < HEADER.size:
+            self.close()
+            raise SnapshotError("快照文件头不完整")
+
+        (magic, version, _, self.user_count, self.plant_count, self.string_count,
+         self.area_count, self._string_offset, self._area_offset,
+         self._user_offset, self._plant_offset) = HEADER.unpack_from(self._view)
+        if magic != MAGIC:
+            self.close()
+            raise SnapshotError("不是植物游戏快照文件")
+        if version != VERSION:
+            self.close()
+            raise SnapshotError(f"不支持的快照版本: {version}")
+
+    def close(self):
+        """释放映射
+
+        plant_block() 返回的 memoryview 直接引用映射内存，应在关闭前释放（或不再引用）。
+        关闭时若仍有这样的视图，映射会在视图全部释放后由垃圾回收关闭。
+        """
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+            self._file.close()
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def string(self, string_id):
+        """按编号读取字符串表中的字符串"""
+        offset, length = STRING_ENTRY.unpack_from(
+            self._view, self._string_offset + string_id * STRING_ENTRY.size)
+        return str(self._view[offset:offset + length], "utf-8")
+
+    def _user_record(self, index):
+        return USER_RECORD.unpack_from(self._view, self._user_offset + index * USER_RECORD.size)
+
+    def usernames(self):
+        """按顺序返回所有用户名"""
+        return [self.string(self._user_record(i)[0]) for i in range(self.user_count)]
+
+    def find_user(self, username):
+        """二分查找用户记录序号，不存在时返回 None"""
+        names = _UserNames(self)
+        index = bisect.bisect_left(names, username)
+        if index < self.user_count and names[index] == username:
+            return index
+        return None
+
+    def plant_block(self, username):
+        """返回用户植物块的 memoryview（零拷贝），用户不存在时返回 None
+
+        返回的视图在快照关闭后不能再使用。
+        """
+        index = self.find_user(username)
+        if index is None:
+            return None
+        record = self._user_record(index)
+        start = record[5]
+        return self._view[start:start + record[6] * PLANT_RECORD.size]
+
+    def iter_plant_records(self, username):
+        """逐条解析用户植物块，返回原始字段元组"""
+        block = self.plant_block(username)
+        if block is None:
+            return iter(())
+        return PLANT_RECORD.iter_unpack(block)
+
+    def iter_plants(self, username):
+        """逐株产出用户的植物（结构与 game_data.json 中相同），不一次性读出全部"""
+        for record in self.iter_plant_records(username):
+            yield self._plant_dict(record)
+
+    def _plant_dict(self, record):
+        (plant_id, type_id, area_id, stage, fruits, water_level, sun_level,
+         last_watered, last_sunned, x, y) = record
+        return {
+            "id": plant_id,
+            "type": self.string(type_id),
+            "area": self.string(area_id),
+            "stage": stage,
+            "water_level": water_level,
+            "sun_level": sun_level,
+            "last_watered": _from_epoch(last_watered),
+            "last_sunned": _from_epoch(last_sunned),
+            "fruits": fruits,
+            "position": [x, y],
+        }
+
+    def get_user(self, username, plants=True):
+        """读取单个用户，结构与 game_data.json 中相同；plants=False 时不读取植物"""
+        index = self.find_user(username)
+        if index is None:
+            return None
+        return self._user_dict(self._user_record(index), plants)
+
+    def _user_dict(self, record, plants=True):
+        _, password_id, points, area_start, area_count, plant_start, plant_count = record
+        areas = [
+            self.string(AREA_ENTRY.unpack_from(self._view, self._area_offset + i * AREA_ENTRY.size)[0])
+            for i in range(area_start, area_start + area_count)
+        ]
+        plant_list = []
+        if plants:
+            block = self._view[plant_start:plant_start + plant_count * PLANT_RECORD.size]
+            plant_list = [self._plant_dict(r) for r in PLANT_RECORD.iter_unpack(block)]
+        return {
+            "password": self.string(password_id),
+            "points": points,
+            "plants": plant_list,
+            "unlocked_areas": areas,
+        }
+
+    def to_users(self):
+        """读取全部用户"""
+        users = {}
+        for i in range(self.user_count):
+            record = self._user_record(i)
+            users[self.string(record[0])] = self._user_dict(record)
+        return users
+
+
+class _UserNames:
+    """按序号惰性读取用户名，供 bisect 使用"""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return self.snapshot.user_count
+
+    def __getitem__(self, index):
+        return self.snapshot.string(self.snapshot._user_record(index)[0])
+
+
+def load_snapshot(path):
+    """读取二进制快照，返回 users 字典"""
+    with Snapshot(path) as snapshot:
+        return snapshot.to_users()
+
+
+def json_to_snapshot(json_path, snapshot_path):
+    """把 game_data.json 转换为二进制快照"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    dump_snapshot(data.get("users", {}), snapshot_path)
+
+
+def snapshot_to_json(snapshot_path, json_path):
+    """把二进制快照转换回 game_data.json 格式"""
+    data = {"users": load_snapshot(snapshot_path)}
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="game_data.json 与二进制快照互相转换")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    to_bin = subparsers.add_parser("to-snapshot", help="JSON 转换为快照")
+    to_bin.add_argument("source", nargs="?", default="game_data.json")
+    to_bin.add_argument("target", nargs="?", default="game_data.snap")
+    to_json = subparsers.add_parser("to-json", help="快照转换为 JSON")
+    to_json.add_argument("source", nargs="?", default="game_data.snap")
+    to_json.add_argument("target", nargs="?", default="game_data.json")
+    args = parser.parse_args()
+
+    if args.command == "to-snapshot":
+        json_to_snapshot(args.source, args.target)
+    else:
+        snapshot_to_json(args.source, args.target)
+
+
+if __name__ == "__main__":
+    main()
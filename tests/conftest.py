@@ -0,0 +1,28 @@
+# -*- coding: UTF-8 -*-
+import os
+
+# huabei 在导入时会初始化 pygame 并创建窗口，测试中使用虚拟显示/音频设备
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pytest
+
+
+@pytest.fixture
+def game_data(tmp_path, monkeypatch):
+    """已登录用户 tester 的 GameData，存档写在临时目录"""
+    import huabei
+
+    monkeypatch.chdir(tmp_path)
+    data = huabei.GameData()
+    data.users["tester"] = {
+        "password": "pw",
+        "points": 1000,
+        "plants": [],
+        "unlocked_areas": ["garden"],
+    }
+    # 预先缓存会话，登录时不需要计算慢哈希
+    data.credentials.remember("tester", "pw", "pw")
+    assert data.login_user("tester", "pw")[0]
+    yield data
+    data.credentials.shutdown()
@@ -0,0 +1,145 @@
+# -*- coding: UTF-8 -*-
+from datetime import datetime, timedelta
+
+import pytest
+
+import huabei
+
+
+def brute_force_minutes(last_time, now, ticks):
+    """逐帧累计：第 j 帧（从 now 往前数）距 last_time 的分钟数，之前的帧不计"""
+    elapsed = (now - last_time).total_seconds()
+    return sum(max(0, elapsed - j / huabei.FPS) for j in range(ticks)) / 60
+
+
+@pytest.mark.parametrize("elapsed_seconds, ticks", [
+    (180, 1),          # 单帧与实时规则一致
+    (1200, 18000),     # 上次浇水早于补算窗口
+    (60, 18000),       # 补算窗口开始时还没浇水
+    (0.5, 100),
+    (0, 10),
+])
+def test_replay_minutes_matches_per_frame_sum(elapsed_seconds, ticks):
+    now = datetime(2026, 10, 1, 12, 0, 0)
+    last_time = now - timedelta(seconds=elapsed_seconds)
+
+    assert huabei.replay_minutes(last_time, now, ticks) == pytest.approx(
+        brute_force_minutes(last_time, now, ticks))
+
+
+def test_replay_minutes_single_frame_and_future():
+    now = datetime(2026, 10, 1, 12, 0, 0)
+    assert huabei.replay_minutes(now - timedelta(minutes=3), now, 1) == pytest.approx(3)
+    assert huabei.replay_minutes(now + timedelta(minutes=1), now, 100) == 0
+
+
+def test_missed_fruits_capped_at_five():
+    assert huabei.missed_fruits(0) == 0
+    assert all(huabei.missed_fruits(10 ** 7) == 5 for _ in range(20))
+    assert all(0 <= huabei.missed_fruits(3000) <= 5 for _ in range(100))
+
+
+def test_login_suspends_other_unlocked_areas(game_data):
+    game_data.users["tester"]["unlocked_areas"].append("orchard")
+    assert game_data.login_user("tester", "pw")[0]
+
+    assert game_data.current_area == "garden"
+    assert set(game_data.suspended_areas) == {"orchard"}
+
+
+def test_unlock_area_suspends_new_area(game_data):
+    points = game_data.get_user_points()
+
+    assert game_data.unlock_area("orchard") == (True, "已解锁果园")
+    assert game_data.get_user_points() == points - huabei.AREAS["orchard"][1]
+    assert "orchard" in game_data.suspended_areas
+    assert game_data.unlock_area("orchard")[0] is False
+    assert game_data.unlock_area("greenhouse")[0] is True
+    game_data.users["tester"]["points"] = 0
+    assert game_data.unlock_area("nowhere") == (False, "区域不存在")
+
+
+def test_switch_area_suspends_and_catches_up(game_data):
+    assert game_data.switch_area("orchard") == (False, "该区域未解锁")
+    game_data.unlock_area("orchard")
+
+    assert game_data.switch_area("orchard") == (True, "已进入果园")
+    assert game_data.current_area == "orchard"
+    assert "orchard" not in game_data.suspended_areas
+    assert "garden" in game_data.suspended_areas
+
+
+def test_catch_up_replays_decay_after_recent_watering(game_data):
+    game_data.unlock_area("orchard")
+    game_data.add_plant("普通树", "orchard")
+    plant = game_data.get_user_plants()[0]
+    watered = (datetime.now() - timedelta(minutes=1)).isoformat()
+    plant["last_watered"] = plant["last_sunned"] = watered
+    game_data.suspended_areas["orchard"] = datetime.now() - timedelta(minutes=10)
+
+    game_data.switch_area("orchard")
+
+    assert plant["water_level"] == 0
+    assert plant["sun_level"] == 0
+    assert plant["stage"] == 1
+
+
+def test_catch_up_checks_growth_after_replay(game_data):
+    game_data.unlock_area("orchard")
+    game_data.add_plant("普通树", "orchard")
+    plant = game_data.get_user_plants()[0]
+    plant.update(water_level=90, sun_level=90)
+    earlier = (datetime.now() - timedelta(minutes=20)).isoformat()
+    plant["last_watered"] = plant["last_sunned"] = earlier
+    game_data.suspended_areas["orchard"] = datetime.now() - timedelta(minutes=10)
+    points = game_data.get_user_points()
+
+    game_data.switch_area("orchard")
+
+    assert plant["stage"] == 1
+    assert game_data.get_user_points() == points
+
+
+def test_catch_up_fruits_capped(game_data):
+    game_data.unlock_area("orchard")
+    game_data.add_plant("普通树", "orchard")
+    plant = game_data.get_user_plants()[0]
+    plant.update(stage=2, fruits=4)
+    game_data.suspended_areas["orchard"] = datetime.now() - timedelta(days=1)
+
+    game_data.switch_area("orchard")
+
+    assert plant["fruits"] == 5
+
+
+def test_single_plant_actions_catch_up_suspended_area(game_data):
+    game_data.unlock_area("orchard")
+    game_data.add_plant("普通树", "orchard")
+    plant = game_data.get_user_plants()[0]
+    earlier = (datetime.now() - timedelta(minutes=30)).isoformat()
+    plant["last_watered"] = plant["last_sunned"] = earlier
+    game_data.suspended_areas["orchard"] = datetime.now() - timedelta(minutes=10)
+
+    assert game_data.water_plant(plant["id"]) == (True, "浇水成功")
+
+    # 先补算到 0，再浇水 +30
+    assert plant["water_level"] == 30
+    assert plant["sun_level"] == 0
+    assert game_data.suspended_areas["orchard"] > datetime.now() - timedelta(seconds=5)
+    assert game_data.water_plant(99) == (False, "植物不存在")
+    assert game_data.harvest_fruits(plant["id"]) == (False, "该植物没有可收获的果实")
+
+
+def test_update_only_simulates_active_area(game_data):
+    game_data.add_plant("普通树")
+    game_data.unlock_area("orchard")
+    game_data.add_plant("普通树", "orchard")
+    garden_plant, orchard_plant = game_data.get_user_plants()
+    earlier = (datetime.now() - timedelta(minutes=10)).isoformat()
+    for plant in (garden_plant, orchard_plant):
+        plant["last_watered"] = plant["last_sunned"] = earlier
+
+    game_data.update_plant_status()
+
+    assert garden_plant["water_level"] < 50
+    assert orchard_plant["water_level"] == 50
@@ -0,0 +1,102 @@
+# -*- coding: UTF-8 -*-
+import huabei
+
+
+def plant_garden(data, count):
+    for _ in range(count):
+        assert data.add_plant("普通树")[0]
+    return data.get_user_plants()
+
+
+def test_results_for_ids(game_data):
+    plant_garden(game_data, 2)
+
+    success, msg, results = game_data.water_plants({0, 9})
+
+    assert success
+    assert results == {0: (True, "浇水成功"), 9: (False, "植物不存在")}
+    assert game_data.get_user_plants()[0]["water_level"] == 80
+
+
+def test_results_for_predicate(game_data):
+    plants = plant_garden(game_data, 3)
+    plants[1]["water_level"] = 10
+
+    success, msg, results = game_data.water_plants(predicate=lambda p: p["water_level"] < 30)
+
+    assert results == {1: (True, "浇水成功")}
+    assert msg == "浇水成功"
+    assert [p["water_level"] for p in plants] == [50, 40, 50]
+
+
+def test_results_for_ids_and_predicate(game_data):
+    plants = plant_garden(game_data, 2)
+    plants[1]["water_level"] = 10
+
+    success, msg, results = game_data.sun_plants(
+        {0, 1, 5}, predicate=lambda p: p["water_level"] < 30)
+
+    assert results == {
+        0: (False, "不符合条件"),
+        1: (True, "晒太阳成功"),
+        5: (False, "植物不存在"),
+    }
+    assert msg == "批量晒太阳：成功1株，共3株"
+
+
+def test_no_matching_plants(game_data):
+    plant_garden(game_data, 1)
+
+    assert game_data.harvest_plants(predicate=lambda p: p["fruits"] > 0) == (
+        False, "没有符合条件的植物", {})
+
+
+def test_single_save_per_call(game_data):
+    plant_garden(game_data, 5)
+
+    before = huabei.SAVE_COUNT.value()
+    game_data.water_plants()
+    game_data.sun_plants({0, 1, 2})
+    assert huabei.SAVE_COUNT.value() - before == 2
+
+
+def test_single_save_for_suspended_area(game_data):
+    assert game_data.unlock_area("orchard")[0]
+    assert game_data.add_plant("普通树", "orchard")[0]
+    assert "orchard" in game_data.suspended_areas
+
+    before = huabei.SAVE_COUNT.value()
+    game_data.water_plants(area="orchard")
+    assert huabei.SAVE_COUNT.value() - before == 1
+    assert "orchard" in game_data.suspended_areas
+
+
+def test_harvest_points(game_data):
+    plants = plant_garden(game_data, 3)
+    plants[0]["fruits"] = 2
+    plants[2]["fruits"] = 3
+    points = game_data.get_user_points()
+
+    success, msg, results = game_data.harvest_plants()
+
+    assert success
+    assert results[1] == (False, "该植物没有可收获的果实")
+    assert game_data.get_user_points() - points == 50
+    assert [p["fruits"] for p in plants] == [0, 0, 0]
+
+
+def test_area_scoping(game_data):
+    plant_garden(game_data, 1)
+    assert game_data.unlock_area("orchard")[0]
+    assert game_data.add_plant("普通树", "orchard")[0]
+    garden_plant, orchard_plant = game_data.get_user_plants()
+
+    success, msg, results = game_data.water_plants()
+    assert set(results) == {garden_plant["id"]}
+    assert orchard_plant["water_level"] < 80
+
+    success, msg, results = game_data.water_plants({orchard_plant["id"]})
+    assert results == {orchard_plant["id"]: (False, "植物不存在")}
+
+    success, msg, results = game_data.water_plants({orchard_plant["id"]}, area="orchard")
+    assert results == {orchard_plant["id"]: (True, "浇水成功")}
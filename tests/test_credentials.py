@@ -0,0 +1,114 @@
+# -*- coding: UTF-8 -*-
+import pytest
+
+import credentials
+
+
+@pytest.fixture(autouse=True)
+def fast_hash(monkeypatch):
+    # 测试中使用较小的参数，避免慢哈希拖慢测试
+    monkeypatch.setattr(credentials, "SCRYPT_N", 2 ** 4)
+    monkeypatch.setattr(credentials, "PBKDF2_ITERATIONS", 10)
+
+
+@pytest.fixture
+def service():
+    service = credentials.CredentialService(max_workers=1, cache_size=3)
+    yield service
+    service.shutdown()
+
+
+def test_hash_and_verify_round_trip():
+    stored = credentials.hash_password("密码123")
+
+    assert credentials.is_hashed(stored)
+    assert credentials.verify_password(stored, "密码123") == (True, None)
+
+
+def test_wrong_password_rejected():
+    stored = credentials.hash_password("secret")
+
+    assert credentials.verify_password(stored, "Secret") == (False, None)
+
+
+def test_pbkdf2_fallback(monkeypatch):
+    monkeypatch.setattr(credentials, "HAS_SCRYPT", False)
+    stored = credentials.hash_password("secret")
+
+    assert stored.startswith("pbkdf2_sha256$10$")
+    assert credentials.verify_password(stored, "secret") == (True, None)
+
+
+def test_legacy_plaintext_returns_upgrade_hash():
+    ok, new_hash = credentials.verify_password("plain", "plain")
+
+    assert ok
+    assert credentials.is_hashed(new_hash)
+    assert credentials.verify_password(new_hash, "plain") == (True, None)
+    assert credentials.verify_password("plain", "other") == (False, None)
+
+
+def test_outdated_parameters_are_upgraded(monkeypatch):
+    stored = credentials.hash_password("secret")
+    monkeypatch.setattr(credentials, "SCRYPT_N", 2 ** 5)
+
+    ok, new_hash = credentials.verify_password(stored, "secret")
+
+    assert ok
+    assert new_hash.startswith("scrypt$32$")
+
+
+@pytest.mark.parametrize("stored", [
+    "plain",
+    "",
+    "pbkdf2_sha256$a$b$c",
+    "pbkdf2_sha256$0$00$11",
+    "pbkdf2_sha256$10$00$",
+    "pbkdf2_sha256$10$zz$11",
+    "scrypt$3$8$1$00$11",
+    "scrypt$16$0$1$00$11",
+    "scrypt$16$8$1$00",
+    "scrypt$x$8$1$00$11",
+])
+def test_is_hashed_rejects_malformed(stored):
+    assert not credentials.is_hashed(stored)
+    # 这样的旧数据按明文校验，不会因为解析失败而抛出异常
+    assert credentials.verify_password(stored, stored)[0]
+
+
+def test_is_hashed_accepts_valid():
+    assert credentials.is_hashed("scrypt$16$8$1$00$11")
+    assert credentials.is_hashed("pbkdf2_sha256$10$00$11")
+
+
+def test_cache_misses_after_stored_hash_changes(service):
+    stored = credentials.hash_password("secret")
+    service.remember("alice", stored, "secret")
+
+    assert service.is_cached("alice", stored, "secret")
+    assert not service.is_cached("alice", stored, "other")
+    assert not service.is_cached("alice", credentials.hash_password("secret"), "secret")
+    service.forget("alice")
+    assert not service.is_cached("alice", stored, "secret")
+
+
+def test_cache_is_bounded_lru(service):
+    for name in ("a", "b", "c"):
+        service.remember(name, "h", "pw")
+    # 访问 a 后，最久未使用的是 b
+    assert service.is_cached("a", "h", "pw")
+    service.remember("d", "h", "pw")
+
+    assert len(service._cache) == 3
+    assert not service.is_cached("b", "h", "pw")
+    assert all(service.is_cached(name, "h", "pw") for name in ("a", "c", "d"))
+
+
+def test_verify_async(service):
+    stored = credentials.hash_password("secret")
+
+    assert service.verify_async("alice", stored, "secret").result() == (True, None)
+    assert service.verify_async("alice", stored, "bad").result() == (False, None)
+    service.remember("alice", stored, "secret")
+    future = service.verify_async("alice", stored, "secret")
+    assert future.done() and future.result() == (True, None)
@@ -0,0 +1,92 @@
+# -*- coding: UTF-8 -*-
+import json
+
+import pytest
+
+import export_gardens
+import snapshot
+
+
+def make_users():
+    users = {}
+    for u in range(5):
+        users[f"用户{u}"] = {
+            "password": "p",
+            "points": u * 100,
+            "plants": [
+                {
+                    "id": i,
+                    "type": "普通树",
+                    "area": "garden" if i % 2 else "orchard",
+                    "stage": 1 + i % 2,
+                    "water_level": 50 if i % 3 else 12.5,
+                    "sun_level": 0,
+                    "last_watered": "2026-10-01T10:00:00.123456",
+                    "last_sunned": "2026-10-01T10:00:00",
+                    "fruits": i % 4,
+                    "position": [100 + i, 200],
+                }
+                for i in range(u * 3)
+            ],
+            "unlocked_areas": ["garden", "orchard"],
+        }
+    return users
+
+
+def rebuild(path):
+    users = {}
+    for kind, username, user, item in export_gardens.iter_records(path):
+        data = users.setdefault(username, {"plants": []})
+        if kind == "plant":
+            data["plants"].append(item)
+        else:
+            data.update(user)
+            assert item == len(data["plants"])
+    return users
+
+
+@pytest.mark.parametrize("chunk_size", [3, 64, 64 * 1024])
+def test_streams_json_across_chunk_boundaries(tmp_path, monkeypatch, chunk_size):
+    path = tmp_path / "game_data.json"
+    users = make_users()
+    path.write_text(json.dumps({"users": users}, ensure_ascii=False, indent=4), encoding="utf-8")
+    monkeypatch.setattr(export_gardens, "CHUNK_SIZE", chunk_size)
+
+    assert rebuild(path) == users
+
+
+def test_streams_snapshot(tmp_path):
+    path = tmp_path / "game_data.snap"
+    users = make_users()
+    snapshot.dump_snapshot(users, path)
+
+    assert rebuild(path) == users
+
+
+def test_export_filters_and_summary(tmp_path):
+    path = tmp_path / "game_data.json"
+    path.write_text(json.dumps({"users": make_users()}), encoding="utf-8")
+
+    summary = export_gardens.export(path, tmp_path / "out", min_points=300, stage=1)
+
+    assert summary.users == 2
+    assert summary.plants == 5 + 6
+    assert summary.stage_counts == {1: 11}
+    lines = (tmp_path / "out" / "plants.csv").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1 + 11
+
+
+def test_parquet_schema_is_fixed(tmp_path, monkeypatch):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "game_data.json"
+    path.write_text(json.dumps({"users": make_users()}), encoding="utf-8")
+    # 每批一行，整数和小数的水分会落在不同批次
+    monkeypatch.setattr(export_gardens, "PARQUET_BATCH_SIZE", 1)
+
+    export_gardens.export(path, tmp_path / "out", "parquet")
+    export_gardens.export(path, tmp_path / "empty", "parquet", usernames={"nobody"})
+
+    assert parquet.read_table(tmp_path / "out" / "plants.parquet").num_rows == 30
+    empty = parquet.read_table(tmp_path / "empty" / "plants.parquet")
+    assert empty.num_rows == 0
+    assert empty.schema.names == export_gardens.PLANT_COLUMNS
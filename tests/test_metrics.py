@@ -0,0 +1,98 @@
+# -*- coding: UTF-8 -*-
+import os
+
+import pytest
+
+import metrics
+
+
+def test_counter_and_gauge():
+    registry = metrics.Registry()
+    counter = registry.counter("test_total", "计数")
+    counter.inc()
+    counter.inc(2, action="water")
+    gauge = registry.gauge("test_gauge", "当前值")
+    gauge.set(1.5)
+
+    assert counter.value() == 1
+    assert counter.value(action="water") == 2
+    assert registry.counter("test_total", "计数") is counter
+    text = registry.render()
+    assert "# TYPE test_total counter" in text
+    assert 'test_total{action="water"} 2' in text
+    assert "test_gauge 1.5" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = metrics.Registry()
+    histogram = registry.histogram("test_seconds", "耗时", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 3):
+        histogram.observe(value)
+
+    lines = registry.render().splitlines()
+
+    assert 'test_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{le="1"} 3' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 4' in lines
+    assert "test_seconds_sum 4.05" in lines
+    assert "test_seconds_count 4" in lines
+    assert histogram.count() == 4
+
+
+def test_histogram_labels_include_le():
+    registry = metrics.Registry()
+    histogram = registry.histogram("test_seconds", "耗时", buckets=(1,))
+    histogram.observe(2, kind="save")
+
+    text = registry.render()
+
+    assert 'test_seconds_bucket{kind="save",le="1"} 0' in text
+    assert 'test_seconds_bucket{kind="save",le="+Inf"} 1' in text
+    assert 'test_seconds_count{kind="save"} 1' in text
+
+
+def test_label_escaping():
+    registry = metrics.Registry()
+    registry.counter("test_total", "计数").inc(user='a"b\\c\nd')
+
+    assert 'test_total{user="a\\"b\\\\c\\nd"} 1' in registry.render()
+
+
+def test_name_reused_with_other_type():
+    registry = metrics.Registry()
+    registry.counter("test_metric", "计数")
+
+    with pytest.raises(ValueError):
+        registry.histogram("test_metric", "耗时")
+
+
+def test_write_textfile_replaces_atomically(tmp_path, monkeypatch):
+    registry = metrics.Registry()
+    registry.counter("test_total", "计数").inc()
+    path = tmp_path / "metrics.prom"
+    path.write_text("old", encoding="utf-8")
+    replaced = []
+    real_replace = os.replace
+
+    def spy_replace(src, dst):
+        # 替换之前目标文件仍是旧内容，新内容只在临时文件中
+        assert path.read_text(encoding="utf-8") == "old"
+        replaced.append((src, dst))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(metrics.os, "replace", spy_replace)
+    metrics.write_textfile(str(path), registry)
+
+    assert replaced and replaced[0][1] == str(path)
+    assert path.read_text(encoding="utf-8") == registry.render()
+    assert os.listdir(tmp_path) == ["metrics.prom"]
+
+
+def test_login_records_latency(game_data):
+    import huabei
+
+    before = huabei.LOGIN_SECONDS.count()
+    game_data.login_user("tester", "pw")
+    game_data.login_user("tester", "wrong")
+
+    assert huabei.LOGIN_SECONDS.count() - before == 2
@@ -0,0 +1,93 @@
+# -*- coding: UTF-8 -*-
+import json
+
+import pytest
+
+import snapshot
+
+
+def make_users():
+    return {
+        "小明": {
+            "password": "scrypt$16384$8$1$00$11",
+            "points": 250,
+            "plants": [
+                {
+                    "id": 0,
+                    "type": "普通树",
+                    "area": "garden",
+                    "stage": 2,
+                    "water_level": 87.5,
+                    "sun_level": 0,
+                    "last_watered": "2026-10-01T10:00:00.123456",
+                    "last_sunned": "2026-10-01T09:30:00",
+                    "fruits": 3,
+                    "position": [120, 340],
+                },
+                {
+                    "id": 1,
+                    "type": "普通树",
+                    "area": "orchard",
+                    "stage": 1,
+                    "water_level": 50,
+                    "sun_level": 12.25,
+                    "last_watered": "2026-10-02T08:00:00",
+                    "last_sunned": "2026-10-02T08:00:00",
+                    "fruits": 0,
+                    "position": [400, 250],
+                },
+            ],
+            "unlocked_areas": ["garden", "orchard"],
+        },
+        "alice": {
+            "password": "plain",
+            "points": 100,
+            "plants": [],
+            "unlocked_areas": ["garden"],
+        },
+    }
+
+
+def test_json_round_trip(tmp_path):
+    source = tmp_path / "game_data.json"
+    snap = tmp_path / "game_data.snap"
+    target = tmp_path / "back.json"
+    users = make_users()
+    source.write_text(json.dumps({"users": users}, ensure_ascii=False), encoding="utf-8")
+
+    snapshot.json_to_snapshot(source, snap)
+    snapshot.snapshot_to_json(snap, target)
+
+    assert json.loads(target.read_text(encoding="utf-8"))["users"] == users
+
+
+def test_plant_block_access(tmp_path):
+    path = tmp_path / "game_data.snap"
+    snapshot.dump_snapshot(make_users(), path)
+
+    with snapshot.Snapshot(path) as snap:
+        assert snap.usernames() == ["alice", "小明"]
+        assert snap.find_user("nobody") is None
+        assert len(snap.plant_block("小明")) == 2 * snapshot.PLANT_RECORD.size
+        assert len(snap.plant_block("alice")) == 0
+        records = list(snap.iter_plant_records("小明"))
+        assert [r[0] for r in records] == [0, 1]
+        assert snap.string(records[1][2]) == "orchard"
+
+
+def test_close_with_live_plant_block(tmp_path):
+    path = tmp_path / "game_data.snap"
+    snapshot.dump_snapshot(make_users(), path)
+
+    snap = snapshot.Snapshot(path)
+    block = snap.plant_block("小明")
+    snap.close()
+    assert snap._file.closed
+    block.release()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not_a_snapshot"
+    path.write_bytes(b"{}" * 40)
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.Snapshot(path)